@@ -16,20 +16,36 @@ if sys.platform == "win32":
 import base64
 import asyncio
 import hashlib
+import io
+import sqlite3
+import struct
+import tempfile
+import threading
 import time
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
 import mimetypes
 import multiprocessing
+import uuid
+from urllib.parse import quote
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# Enable OpenCV's EXR codec once, before cv2 is imported
+# (OpenCV caches this setting, so toggling it after import is not supported)
+os.environ.setdefault("OPENCV_IO_ENABLE_OPENEXR", "1")
+
+# Parallelism comes from our thread/process pools, one image per worker;
+# OpenMP teams inside every OpenCV call would oversubscribe the cores
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
 try:
-    from fastapi import FastAPI, HTTPException
+    from fastapi import FastAPI, HTTPException, Request
     from fastapi.middleware.cors import CORSMiddleware
-    from fastapi.responses import Response
+    from fastapi.responses import FileResponse, Response, StreamingResponse
     from pydantic import BaseModel
     import uvicorn
     from PIL import Image
@@ -40,6 +56,45 @@ except ImportError as e:
     print("Please install requirements: pip install fastapi uvicorn pillow opencv-python numpy")
     sys.exit(1)
 
+# Single-threaded OpenCV calls: trades single-image latency for batch throughput
+cv2.setNumThreads(1)
+
+# Optional packages
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    # Module missing or libturbojpeg shared library not found
+    turbo_jpeg = None
+
+try:
+    import OpenEXR
+except ImportError:
+    OpenEXR = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+try:
+    import pyvips
+    # Every thumbnail opens a different file, so vips' operation cache never hits
+    pyvips.cache_set_max(0)
+except (ImportError, OSError):
+    # Module missing or libvips shared library not found
+    pyvips = None
+
 # Initialize FastAPI app
 app = FastAPI(title="Image Viewer Pro Backend", version="1.0.0")
 
@@ -53,29 +108,86 @@ app.add_middleware(
 )
 
 # Supported image extensions
-SUPPORTED_EXTENSIONS = {
+SUPPORTED_EXTENSIONS = frozenset({
     '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif',
     '.webp', '.exr', '.hdr', '.pic', '.psd'
+})
+
+# OpenCV flags for libjpeg DCT-domain scaled decode (1/1, 1/2, 1/4, 1/8)
+JPEG_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION,
+    2: cv2.IMREAD_REDUCED_COLOR_2 | cv2.IMREAD_IGNORE_ORIENTATION,
+    4: cv2.IMREAD_REDUCED_COLOR_4 | cv2.IMREAD_IGNORE_ORIENTATION,
+    8: cv2.IMREAD_REDUCED_COLOR_8 | cv2.IMREAD_IGNORE_ORIENTATION,
+}
+
+# Thumbnail output formats: cache file suffix and media type
+THUMBNAIL_FORMATS = {
+    'jpeg': ('.jpg', 'image/jpeg'),
+    'webp': ('.webp', 'image/webp'),
 }
 
+# /batch-thumbnails-binary framing (little-endian): u32 count, then per image
+# u32 path_len, path (UTF-8), u8 status (1 = JPEG, 0 = UTF-8 error), u32 width,
+# u32 height, u32 blob_len, blob
+BATCH_COUNT_STRUCT = struct.Struct('<I')
+BATCH_PATH_LEN_STRUCT = struct.Struct('<I')
+BATCH_ITEM_STRUCT = struct.Struct('<BIII')
+
+# Bump to invalidate every cached thumbnail (e.g. after a pipeline change)
+CACHE_VERSION = 4
+
 # Performance configurations
 MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)  # Otimizado para I/O bound
+SERVER_WORKERS = int(os.environ.get('BACKEND_WORKERS', '1'))  # uvicorn processes (inherited by each worker)
+PIL_THUMBNAIL_RESAMPLE = Image.Resampling.BICUBIC  # Filter for the PIL fallback thumbnails
+# Total HDR scratch buffers kept for reuse, per process; the default holds one 4K RGBA float32
+# frame (3840x2160x4, ~127 MiB); larger frames skip the pool and allocate per call
+HDR_SCRATCH_MAX_BYTES = int(os.environ.get('HDR_SCRATCH_MAX_MB', '128')) * 1024 * 1024
+SCAN_CACHE_MAX_FOLDERS = 32  # Folder scans kept for repeat requests (see scan_images)
+CUDA_RESIZE_MIN_BYTES = 4_000_000  # Smaller images resize faster on CPU than the GPU round trip
 
-# Setup cache directory
+# CUDA resize needs an OpenCV build with CUDA (pip wheels report 0 devices)
 try:
-    CACHE_DIR = Path.home() / '.image_viewer_cache'
-    CACHE_DIR.mkdir(exist_ok=True)
+    CUDA_AVAILABLE = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    CUDA_AVAILABLE = False
+
+# Setup cache directory (THUMB_CACHE overrides the default location)
+try:
+    CACHE_DIR = Path(os.environ.get('THUMB_CACHE', Path.home() / '.image_viewer_cache'))
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
     cache_status = "enabled"
 except Exception as e:
     # Fallback to temp directory
-    import tempfile
     CACHE_DIR = Path(tempfile.gettempdir()) / 'image_viewer_cache'
     CACHE_DIR.mkdir(exist_ok=True)
     cache_status = f"fallback to temp ({e})"
 
+# Cache size limit (THUMB_CACHE_MAX_MB overrides), least recently used thumbnails go first
+CACHE_MAX_BYTES = int(os.environ.get('THUMB_CACHE_MAX_MB', '2048')) * 1024 * 1024
+CACHE_INDEX_PATH = CACHE_DIR / 'index.sqlite'
+
 # Thread pool para processamento paralelo
 thread_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
 
+# Process pool for CPU-bound batch work, created on first use (see get_process_pool)
+process_pool = None
+
+# Last scan per (folder, recursive): ([(directory, mtime_ns), ...], images), oldest first
+scan_cache = {}
+scan_cache_lock = threading.Lock()
+
+# Idle float32 scratch buffers for HDR tone mapping, shared by all threads (see acquire_hdr_scratch)
+hdr_scratch_pool = []
+hdr_scratch_lock = threading.Lock()
+
+# Per-thread GPU source/destination buffers for CUDA resizes (see resize_image_cuda)
+gpu_scratch = threading.local()
+
+# Per-thread connection to the cache index (see get_cache_db)
+cache_db_local = threading.local()
+
 print(f"Performance config: {MAX_WORKERS} workers, Cache: {cache_status}")
 print(f"Cache directory: {CACHE_DIR}")
 
@@ -83,6 +195,7 @@ print(f"Cache directory: {CACHE_DIR}")
 class ScanFolderRequest(BaseModel):
     folder_path: str
     recursive: bool = False
+    refresh: bool = False  # Rescan even if no folder mtime changed (in-place edits, FAT/SMB mtimes)
 
 class ThumbnailRequest(BaseModel):
     image_path: str
@@ -136,94 +249,196 @@ class ImageInfoResult(BaseModel):
     error: Optional[str] = None
 
 # Utility functions
-def is_image_file(file_path: Path) -> bool:
-    """Check if file is a supported image format"""
-    return file_path.suffix.lower() in SUPPORTED_EXTENSIONS
+def get_extension(name: str) -> str:
+    """Get lowercase extension of a file name (same rules as Path.suffix)"""
+    i = name.rfind('.')
+    return name[i:].lower() if 0 < i < len(name) - 1 else ''
+
+def is_image_name(name: str) -> bool:
+    """Check if file name is a supported image format"""
+    return get_extension(name) in SUPPORTED_EXTENSIONS
+
+def iter_files(root: Path, recursive: bool, dir_mtimes: Optional[List] = None):
+    """Yield os.DirEntry for every file under root (one directory read per folder)"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            # Record mtime before listing, so a change during the listing is caught later
+            if dir_mtimes is not None:
+                dir_mtimes.append((directory, os.stat(directory).st_mtime_ns))
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+        except PermissionError:
+            # Skip unreadable subfolders, but report an unreadable root
+            if directory is root:
+                raise
+
+def scan_images(folder_path: Path, recursive: bool, refresh: bool = False) -> List[ImageFile]:
+    """List images under folder_path sorted by name, reusing the last scan if no folder changed"""
+    cache_key = (os.path.abspath(folder_path), recursive)
+    with scan_cache_lock:
+        cached = None if refresh else scan_cache.get(cache_key)
+    if cached is not None:
+        # Adding, removing or renaming a file (or subfolder) bumps its folder's mtime
+        dir_mtimes, images = cached
+        try:
+            if all(os.stat(directory).st_mtime_ns == mtime for directory, mtime in dir_mtimes):
+                return images
+        except OSError:
+            pass
+    
+    # Walk with os.scandir: file type comes from the directory read itself
+    dir_mtimes = []
+    images = [
+        get_file_info(entry)
+        for entry in iter_files(folder_path, recursive, dir_mtimes)
+        if is_image_name(entry.name)
+    ]
+    
+    # Sort by name
+    images.sort(key=lambda x: x.name.lower())
+    
+    # Scans run concurrently on the default executor
+    with scan_cache_lock:
+        scan_cache.pop(cache_key, None)
+        scan_cache[cache_key] = (dir_mtimes, images)
+        while len(scan_cache) > SCAN_CACHE_MAX_FOLDERS:
+            scan_cache.pop(next(iter(scan_cache)))
+    return images
 
-def get_file_info(file_path: Path) -> ImageFile:
-    """Get basic file information"""
+def get_file_info(entry: os.DirEntry) -> ImageFile:
+    """Get basic file information from a scandir entry"""
+    extension = get_extension(entry.name)
     try:
-        stat = file_path.stat()
         return ImageFile(
-            path=str(file_path),
-            name=file_path.name,
-            size=stat.st_size,
-            extension=file_path.suffix.lower(),
-            is_supported=is_image_file(file_path)
+            path=entry.path,
+            name=entry.name,
+            size=entry.stat().st_size,
+            extension=extension,
+            is_supported=extension in SUPPORTED_EXTENSIONS
         )
     except Exception as e:
         return ImageFile(
-            path=str(file_path),
-            name=file_path.name,
+            path=entry.path,
+            name=entry.name,
             size=0,
-            extension=file_path.suffix.lower(),
+            extension=extension,
             is_supported=False
         )
 
+# OpenCV decodes these only from a file path, never from memory
+FILE_ONLY_EXTENSIONS = {'.exr', '.hdr', '.pic'}
+
 def load_image_opencv(image_path: str) -> Optional[np.ndarray]:
-    """Load image using OpenCV with EXR support and GPU optimization"""
+    """Load image using OpenCV with EXR support (keeps OpenCV's native BGR/BGRA order)"""
     try:
-        # Set OpenEXR environment variable
-        os.environ["OPENCV_IO_ENABLE_OPENEXR"] = "1"
-        
-        # Load image
-        img = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+        # Load image: one plain read, then decode from memory
+        # (EXR and Radiance decoders are file-only, imdecode would spill them to a temp file)
+        if get_extension(image_path) in FILE_ONLY_EXTENSIONS:
+            img = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+        else:
+            img = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
         
         if img is None:
             return None
-            
-        # Convert BGR to RGB for regular images
-        if len(img.shape) == 3 and img.shape[2] == 3:
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        elif len(img.shape) == 3 and img.shape[2] == 4:
-            img = cv2.cvtColor(img, cv2.COLOR_BGRA2RGBA)
-            
+        
+        # No BGR -> RGB swap: resize and cv2.imencode consume BGR directly
         return img
     except Exception as e:
         print(f"OpenCV load failed for {image_path}: {e}")
         return None
 
-def create_thumbnail_optimized(img_array: np.ndarray, size: int) -> Image.Image:
+def pick_jpeg_scale(width: int, height: int, size: int) -> int:
+    """Largest JPEG decode denominator (8, 4, 2, 1) that keeps the longest side >= size"""
+    longest = max(width, height)
+    for denom in (8, 4, 2):
+        if -(-longest // denom) >= size:
+            return denom
+    return 1
+
+def load_jpeg_reduced(image_path: str, size: int) -> Optional[np.ndarray]:
+    """Load JPEG in BGR, decoded at the smallest scale still covering size"""
+    try:
+        data = np.fromfile(image_path, dtype=np.uint8)
+        
+        if turbo_jpeg is not None:
+            width, height, _, _ = turbo_jpeg.decode_header(data)
+            denom = pick_jpeg_scale(width, height, size)
+            return turbo_jpeg.decode(data, pixel_format=TJPF_BGR, scaling_factor=(1, denom))
+        
+        # Without PyTurboJPEG, OpenCV's libjpeg does the same scaled decode
+        with Image.open(io.BytesIO(data)) as pil_img:
+            width, height = pil_img.size
+        return cv2.imdecode(data, JPEG_REDUCED_FLAGS[pick_jpeg_scale(width, height, size)])
+    except Exception as e:
+        print(f"Reduced JPEG load failed for {image_path}: {e}")
+        return None
+
+def fit_dimensions(width: int, height: int, size: int) -> Tuple[int, int]:
+    """Scale dimensions so the longest side equals size, keeping aspect ratio"""
+    scale = size / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def resize_image_cuda(img_array: np.ndarray, width: int, height: int, interpolation: int) -> np.ndarray:
+    """Resize on the GPU (upload, cv2.cuda.resize, download)"""
+    if not hasattr(gpu_scratch, 'src'):
+        gpu_scratch.src = cv2.cuda_GpuMat()
+        gpu_scratch.dst = cv2.cuda_GpuMat()
+    
+    # GpuMat only reallocates when size or type change, so repeat sizes skip cudaMalloc
+    gpu_scratch.src.upload(img_array)
+    cv2.cuda.resize(gpu_scratch.src, (width, height), dst=gpu_scratch.dst, interpolation=interpolation)
+    return gpu_scratch.dst.download()
+
+def resize_image(img_array: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Resize with INTER_AREA when shrinking and INTER_LINEAR when enlarging"""
+    src_height, src_width = img_array.shape[:2]
+    if (width, height) == (src_width, src_height):
+        return img_array
+    
+    enlarge = width >= src_width and height >= src_height
+    interpolation = cv2.INTER_LINEAR if enlarge else cv2.INTER_AREA
+    
+    # Large inputs go to the GPU when OpenCV was built with CUDA
+    if CUDA_AVAILABLE and img_array.nbytes > CUDA_RESIZE_MIN_BYTES:
+        try:
+            return resize_image_cuda(img_array, width, height, interpolation)
+        except (cv2.error, AttributeError) as e:
+            # AttributeError: CUDA build without the cudawarping module
+            print(f"CUDA resize failed, using CPU: {e}")
+    
+    if enlarge:
+        return cv2.resize(img_array, (width, height), interpolation=interpolation)
+    
+    # Beyond 8x, halve with pyrDown first so INTER_AREA only covers the last steps
+    while src_width > width * 8 and src_height > height * 8:
+        img_array = cv2.pyrDown(img_array)
+        src_height, src_width = img_array.shape[:2]
+    
+    return cv2.resize(img_array, (width, height), interpolation=cv2.INTER_AREA)
+
+def create_thumbnail_optimized(img_array: np.ndarray, size: int) -> np.ndarray:
     """Create thumbnail with GPU acceleration if available"""
     try:
         # Process HDR images
         if img_array.dtype in [np.float32, np.float64]:
             img_array = process_hdr_image(img_array)
         
-        # Use OpenCV for resizing (potentially GPU accelerated)
-        height, width = img_array.shape[:2]
-        
         # Calculate new dimensions maintaining aspect ratio
-        if width > height:
-            new_width = size
-            new_height = int((height * size) / width)
-        else:
-            new_height = size
-            new_width = int((width * size) / height)
-        
-        # Resize using OpenCV (faster than PIL)
-        if len(img_array.shape) == 3:
-            resized = cv2.resize(img_array, (new_width, new_height), interpolation=cv2.INTER_LANCZOS4)
-        else:
-            resized = cv2.resize(img_array, (new_width, new_height), interpolation=cv2.INTER_LANCZOS4)
-        
-        # Convert to PIL Image
-        if len(resized.shape) == 2:  # Grayscale
-            pil_img = Image.fromarray(resized, mode='L')
-        elif resized.shape[2] == 3:  # RGB
-            pil_img = Image.fromarray(resized, mode='RGB')
-        elif resized.shape[2] == 4:  # RGBA
-            pil_img = Image.fromarray(resized, mode='RGBA')
-        else:
-            raise ValueError(f"Unsupported image shape: {resized.shape}")
+        height, width = img_array.shape[:2]
+        new_width, new_height = fit_dimensions(width, height, size)
         
-        # Convert RGBA to RGB for JPEG compatibility
-        if pil_img.mode == 'RGBA':
-            background = Image.new('RGB', pil_img.size, (255, 255, 255))
-            background.paste(pil_img, mask=pil_img.split()[3])
-            pil_img = background
+        # Resize using OpenCV's SIMD resamplers (much faster than LANCZOS)
+        resized = resize_image(img_array, new_width, new_height)
         
-        return pil_img
+        # 8-bit, alpha flattened for JPEG compatibility (on the small image)
+        return flatten_alpha(to_uint8(resized))
         
     except Exception as e:
         print(f"Optimized thumbnail creation failed: {e}")
@@ -238,132 +453,324 @@ def load_image_pil(image_path: str) -> Optional[Image.Image]:
         print(f"PIL load failed for {image_path}: {e}")
         return None
 
+def load_thumbnail_pil(image_path: str, size: int, resample=PIL_THUMBNAIL_RESAMPLE) -> Optional[Image.Image]:
+    """Load image using PIL as fallback, already shrunk to fit size x size"""
+    pil_img = load_image_pil(image_path)
+    if pil_img is None:
+        return None
+    
+    # thumbnail() drafts JPEGs itself (DCT-scaled decode to >= 2x size, reducing_gap=2.0)
+    pil_img.thumbnail((size, size), resample)
+    return pil_img
+
+def acquire_hdr_scratch(shape: Tuple[int, ...]) -> np.ndarray:
+    """Take an idle float32 scratch buffer of this shape from the pool, or allocate one"""
+    with hdr_scratch_lock:
+        for i, buf in enumerate(hdr_scratch_pool):
+            if buf.shape == shape:
+                return hdr_scratch_pool.pop(i)
+    return np.empty(shape, dtype=np.float32)
+
+def release_hdr_scratch(buf: np.ndarray):
+    """Return a scratch buffer to the pool, dropping the oldest past HDR_SCRATCH_MAX_BYTES in total"""
+    if buf.nbytes > HDR_SCRATCH_MAX_BYTES:
+        return
+    with hdr_scratch_lock:
+        hdr_scratch_pool.append(buf)
+        while sum(idle.nbytes for idle in hdr_scratch_pool) > HDR_SCRATCH_MAX_BYTES:
+            hdr_scratch_pool.pop(0)
+
 def process_hdr_image(img_array: np.ndarray, gamma: float = 2.2) -> np.ndarray:
     """Process HDR/EXR image with tone mapping"""
     if img_array.dtype == np.float32 or img_array.dtype == np.float64:
-        # Clip negative values
-        img_array = np.maximum(img_array, 0)
-        
-        # Simple tone mapping with gamma correction
-        img_array = np.power(img_array, 1.0 / gamma)
-        
-        # Normalize to 0-1 range
-        img_max = np.max(img_array)
-        if img_max > 0:
-            img_array = img_array / img_max
-        
-        # Convert to 8-bit
-        img_array = (img_array * 255).astype(np.uint8)
+        # Single float32 scratch buffer; every step below runs in place
+        buf = acquire_hdr_scratch(img_array.shape)
+        try:
+            # Clip negative values
+            np.maximum(img_array, 0, out=buf)
+            
+            # Simple tone mapping with gamma correction
+            np.power(buf, 1.0 / gamma, out=buf)
+            
+            # Find max with OpenCV's SIMD reduction (on a single-channel 2D view)
+            _, img_max, _, _ = cv2.minMaxLoc(buf.reshape(buf.shape[0], -1))
+            
+            # Normalize to 0-255 and convert to 8-bit in one fused pass
+            img_array = cv2.convertScaleAbs(buf, alpha=255.0 / img_max if img_max > 0 else 0.0)
+        finally:
+            release_hdr_scratch(buf)
     
     return img_array
 
-def create_thumbnail(img_array: np.ndarray, size: int) -> Image.Image:
-    """Create thumbnail from numpy array"""
-    # Process HDR images
-    if img_array.dtype in [np.float32, np.float64]:
-        img_array = process_hdr_image(img_array)
-    
-    # Convert to PIL Image
-    if len(img_array.shape) == 2:  # Grayscale
-        pil_img = Image.fromarray(img_array, mode='L')
-    elif img_array.shape[2] == 3:  # RGB
-        pil_img = Image.fromarray(img_array, mode='RGB')
-    elif img_array.shape[2] == 4:  # RGBA
-        pil_img = Image.fromarray(img_array, mode='RGBA')
-    else:
+def to_uint8(img_array: np.ndarray) -> np.ndarray:
+    """Scale 16-bit images down to 8-bit; 8-bit (LDR) arrays pass through untouched"""
+    if img_array.dtype == np.uint16:
+        # JPEG/WebP encoders would otherwise saturate every value above 255 to white
+        return cv2.convertScaleAbs(img_array, alpha=1.0 / 257)
+    return img_array
+
+def flatten_alpha(img_array: np.ndarray) -> np.ndarray:
+    """Composite BGRA onto a white background; BGR and grayscale pass through"""
+    if len(img_array.shape) == 2 or img_array.shape[2] == 3:
+        return img_array
+    if img_array.shape[2] != 4:
         raise ValueError(f"Unsupported image shape: {img_array.shape}")
     
-    # Create thumbnail
-    pil_img.thumbnail((size, size), Image.Resampling.LANCZOS)
-    
+    alpha = img_array[:, :, 3:4].astype(np.float32) / 255.0
+    bgr = img_array[:, :, :3] * alpha + 255.0 * (1.0 - alpha)
+    return (bgr + 0.5).astype(np.uint8)
+
+def pil_to_bgr(pil_img: Image.Image) -> np.ndarray:
+    """Convert PIL Image (fallback loader) to a BGR/grayscale array for encoding"""
     # Convert RGBA to RGB for JPEG compatibility
     if pil_img.mode == 'RGBA':
         background = Image.new('RGB', pil_img.size, (255, 255, 255))
         background.paste(pil_img, mask=pil_img.split()[3])
         pil_img = background
     
-    return pil_img
+    if pil_img.mode == 'L':
+        return np.asarray(pil_img)
+    if pil_img.mode != 'RGB':
+        pil_img = pil_img.convert('RGB')
+    return cv2.cvtColor(np.asarray(pil_img), cv2.COLOR_RGB2BGR)
+
+def create_thumbnail(img_array: np.ndarray, size: int) -> np.ndarray:
+    """Create BGR thumbnail from numpy array"""
+    # Process HDR images
+    if img_array.dtype in [np.float32, np.float64]:
+        img_array = process_hdr_image(img_array)
+    
+    # Shrink to fit within size x size, never upscale (same as PIL thumbnail)
+    height, width = img_array.shape[:2]
+    if width > size or height > size:
+        img_array = resize_image(img_array, *fit_dimensions(width, height, size))
+    
+    # Flatten alpha for JPEG compatibility
+    return flatten_alpha(to_uint8(img_array))
 
-def get_cache_key(image_path: str, size: int) -> str:
-    """Generate cache key for thumbnail"""
-    # Use file path + modification time + size for cache key
+def get_cache_key(image_path: str, size: int, mtime_ns: Optional[int] = None) -> str:
+    """Generate cache key for thumbnail (pass mtime_ns when the caller already has the stat)"""
+    # Use version + absolute path + size + modification time (ns) for cache key
+    abs_path = os.path.abspath(image_path)
     try:
-        mtime = os.path.getmtime(image_path)
-        cache_string = f"{image_path}_{size}_{mtime}"
-        return hashlib.md5(cache_string.encode()).hexdigest()
-    except:
-        return hashlib.md5(f"{image_path}_{size}".encode()).hexdigest()
-
-def get_cached_thumbnail(cache_key: str) -> Optional[bytes]:
-    """Get cached thumbnail if exists"""
-    cache_file = CACHE_DIR / f"{cache_key}.jpg"
-    if cache_file.exists():
+        if mtime_ns is None:
+            mtime_ns = os.stat(image_path).st_mtime_ns
+        cache_string = f"{CACHE_VERSION}|{abs_path}|{size}|{mtime_ns}"
+    except OSError:
+        cache_string = f"{CACHE_VERSION}|{abs_path}|{size}"
+    
+    # Non-cryptographic lookup key: xxh3 when installed, BLAKE2b otherwise
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(cache_string.encode())
+    return hashlib.blake2b(cache_string.encode(), digest_size=16).hexdigest()
+
+def get_cache_path(cache_key: str, image_format: str = 'jpeg') -> Path:
+    """Get cache file path for a thumbnail"""
+    return CACHE_DIR / f"{cache_key}{THUMBNAIL_FORMATS[image_format][0]}"
+
+def get_cache_db() -> sqlite3.Connection:
+    """Get this thread's connection to the cache index (name, size, atime), created on first use"""
+    db = getattr(cache_db_local, 'db', None)
+    if db is None:
+        # WAL lets every server worker and pool process use the index concurrently
+        db = sqlite3.connect(CACHE_INDEX_PATH, timeout=5, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("BEGIN IMMEDIATE")
+        is_new = db.execute("SELECT 1 FROM sqlite_master WHERE name = 'cache'").fetchone() is None
+        db.execute("CREATE TABLE IF NOT EXISTS cache (name TEXT PRIMARY KEY, size INTEGER NOT NULL, atime REAL NOT NULL)")
+        db.execute("CREATE INDEX IF NOT EXISTS cache_atime ON cache (atime)")
+        
+        # Running total of cache sizes, kept by triggers so eviction never sums the table
+        db.execute("CREATE TABLE IF NOT EXISTS cache_total (id INTEGER PRIMARY KEY CHECK (id = 1), size INTEGER NOT NULL)")
+        db.execute("INSERT OR IGNORE INTO cache_total SELECT 1, COALESCE(SUM(size), 0) FROM cache")
+        db.execute("""CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache
+            BEGIN UPDATE cache_total SET size = size + new.size; END""")
+        db.execute("""CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache
+            BEGIN UPDATE cache_total SET size = size - old.size; END""")
+        db.execute("""CREATE TRIGGER IF NOT EXISTS cache_resize AFTER UPDATE OF size ON cache
+            BEGIN UPDATE cache_total SET size = size + new.size - old.size; END""")
+        
+        if is_new:
+            # Adopt thumbnails cached before the index existed, oldest mtime first to go
+            suffixes = tuple(suffix for suffix, _ in THUMBNAIL_FORMATS.values())
+            with os.scandir(CACHE_DIR) as entries:
+                rows = [
+                    (entry.name, entry.stat().st_size, entry.stat().st_mtime)
+                    for entry in entries
+                    if entry.name.endswith(suffixes)
+                ]
+            db.executemany("INSERT OR IGNORE INTO cache VALUES (?, ?, ?)", rows)
+        db.execute("COMMIT")
+        
+        cache_db_local.db = db
+    return db
+
+def touch_cached_thumbnail(cache_file: Path):
+    """Mark a cached thumbnail as recently used"""
+    try:
+        get_cache_db().execute("UPDATE cache SET atime = ? WHERE name = ?", (time.time(), cache_file.name))
+    except (sqlite3.Error, OSError) as e:
+        print(f"Cache index update failed: {e}")
+
+def evict_cached_thumbnails(db: sqlite3.Connection):
+    """Delete least recently used thumbnails until the cache is back under 90% of its limit"""
+    total = db.execute("SELECT size FROM cache_total").fetchone()[0]
+    if total <= CACHE_MAX_BYTES:
+        return
+    
+    excess = total - int(CACHE_MAX_BYTES * 0.9)
+    evicted = []
+    for name, size in db.execute("SELECT name, size FROM cache ORDER BY atime"):
         try:
-            return cache_file.read_bytes()
-        except:
-            return None
-    return None
+            os.unlink(CACHE_DIR / name)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # Still open (e.g. being sent on Windows): keep its row so a later pass retries it
+            continue
+        evicted.append((name,))
+        excess -= size
+        if excess <= 0:
+            break
+    
+    # Only rows whose file is gone leave the index
+    db.executemany("DELETE FROM cache WHERE name = ?", evicted)
 
-def save_cached_thumbnail(cache_key: str, image_bytes: bytes):
+def save_cached_thumbnail(cache_key: str, image_bytes: bytes, image_format: str = 'jpeg'):
     """Save thumbnail to cache"""
     try:
-        cache_file = CACHE_DIR / f"{cache_key}.jpg"
-        cache_file.write_bytes(image_bytes)
+        cache_file = get_cache_path(cache_key, image_format)
+        
+        # Write to a temp file and rename, so concurrent readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(image_bytes)
+            os.replace(tmp_path, cache_file)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        
+        db = get_cache_db()
+        # Upsert rather than INSERT OR REPLACE: REPLACE's implicit delete skips the total's triggers
+        db.execute(
+            "INSERT INTO cache VALUES (?, ?, ?) ON CONFLICT (name) DO UPDATE SET size = excluded.size, atime = excluded.atime",
+            (cache_file.name, len(image_bytes), time.time())
+        )
+        evict_cached_thumbnails(db)
     except Exception as e:
         print(f"Cache save failed: {e}")
 
-def process_image_worker(image_path: str, size: int) -> Dict:
+def decode_opencv(image_path: str, size: int) -> Optional[np.ndarray]:
+    """Thumbnail decoder: full-resolution OpenCV load"""
+    return load_image_opencv(image_path)
+
+def decode_pil(image_path: str, size: int) -> Optional[np.ndarray]:
+    """Thumbnail decoder: PIL load (already shrunk), converted to BGR"""
+    pil_img = load_thumbnail_pil(image_path, size)
+    return pil_to_bgr(pil_img) if pil_img is not None else None
+
+def decode_vips(image_path: str, size: int) -> Optional[np.ndarray]:
+    """Thumbnail decoder: libvips thumbnail, decoding only what the target size needs (LDR only)"""
+    if pyvips is None:
+        return None
+    try:
+        # Opening reads the header only; pixels are decoded lazily
+        if pyvips.Image.new_from_file(image_path).format in ('float', 'double'):
+            # thumbnail() would convert to 8-bit sRGB and clip everything above 1.0; leave HDR
+            # to OpenCV + process_hdr_image so thumbnails match the full view's tone mapping
+            return None
+        
+        # Streams tiles through the shrink instead of loading the whole image
+        vips_img = pyvips.Image.thumbnail(image_path, size, height=size, size='down')
+        if vips_img.bands == 2:
+            # Grayscale + alpha: composite onto white here, flatten_alpha handles 4 bands only
+            vips_img = vips_img.flatten(background=255)
+        img_array = vips_img.numpy()
+    except pyvips.Error as e:
+        # libvips built without this loader (or unreadable file): use the OpenCV/PIL path
+        print(f"pyvips thumbnail failed for {image_path}: {e}")
+        return None
+    
+    if img_array.ndim == 2:
+        return img_array
+    return cv2.cvtColor(img_array, cv2.COLOR_RGBA2BGRA if img_array.shape[2] == 4 else cv2.COLOR_RGB2BGR)
+
+# Thumbnail decoders to try per extension, in order
+JPEG_DECODERS = (load_jpeg_reduced, decode_opencv, decode_pil)
+THUMBNAIL_DECODERS = {
+    '.jpg': JPEG_DECODERS,
+    '.jpeg': JPEG_DECODERS,
+    '.exr': (decode_opencv,),
+    '.hdr': (decode_opencv,),
+    '.pic': (decode_opencv,),
+    '.psd': (decode_vips, decode_pil),
+    '.tif': (decode_vips, decode_opencv, decode_pil),
+    '.tiff': (decode_vips, decode_opencv, decode_pil),
+}
+DEFAULT_DECODERS = (decode_opencv, decode_pil)
+
+def decode_for_thumbnail(image_path: str, size: int) -> Optional[np.ndarray]:
+    """Decode image with the loaders suited to its extension (BGR/BGRA/gray or float)"""
+    for decoder in THUMBNAIL_DECODERS.get(get_extension(image_path), DEFAULT_DECODERS):
+        img_array = decoder(image_path, size)
+        if img_array is not None:
+            return img_array
+    return None
+
+def process_image_worker(image_path: str, size: int, *, image_format: str = 'jpeg', read_cached: bool = True,
+                         mtime_ns: Optional[int] = None) -> Dict:
     """Worker function for parallel image processing"""
     try:
+        if mtime_ns is None:
+            # One stat serves as the existence check and the cache key mtime
+            try:
+                mtime_ns = os.stat(image_path).st_mtime_ns
+            except OSError:
+                return {'success': False, 'error': 'Image file not found', 'path': image_path}
+        
         # Check cache first
-        cache_key = get_cache_key(image_path, size)
-        cached_bytes = get_cached_thumbnail(cache_key)
+        cache_key = get_cache_key(image_path, size, mtime_ns)
+        cache_file = get_cache_path(cache_key, image_format)
         
-        if cached_bytes:
+        try:
+            # Callers that send the cache file themselves (read_cached=False) skip the read
+            cached_bytes = cache_file.read_bytes() if read_cached else None
+            
+            # Only the image header is parsed to report dimensions
+            with Image.open(io.BytesIO(cached_bytes) if read_cached else cache_file) as cached_img:
+                width, height = cached_img.size
+            touch_cached_thumbnail(cache_file)
+            
             return {
                 'success': True,
                 'image_bytes': cached_bytes,
+                'cache_path': str(cache_file),
+                'width': width,
+                'height': height,
                 'from_cache': True,
                 'path': image_path
             }
+        except OSError:
+            # Not cached (or unreadable entry): generate it below
+            pass
         
         # Process image
-        img_array = load_image_opencv(image_path)
+        img_array = decode_for_thumbnail(image_path, size)
         
         if img_array is not None:
             thumbnail = create_thumbnail_optimized(img_array, size)
-            img_bytes = image_to_bytes(thumbnail, quality=85)
+            img_bytes = encode_thumbnail(thumbnail, image_format)
             
             # Save to cache
-            save_cached_thumbnail(cache_key, img_bytes)
-            
-            return {
-                'success': True,
-                'image_bytes': img_bytes,
-                'width': thumbnail.width,
-                'height': thumbnail.height,
-                'from_cache': False,
-                'path': image_path
-            }
-        
-        # Fallback to PIL
-        pil_img = load_image_pil(image_path)
-        if pil_img is not None:
-            pil_img.thumbnail((size, size), Image.Resampling.LANCZOS)
-            
-            if pil_img.mode == 'RGBA':
-                background = Image.new('RGB', pil_img.size, (255, 255, 255))
-                background.paste(pil_img, mask=pil_img.split()[3])
-                pil_img = background
-            
-            img_bytes = image_to_bytes(pil_img, quality=85)
-            save_cached_thumbnail(cache_key, img_bytes)
+            save_cached_thumbnail(cache_key, img_bytes, image_format)
             
             return {
                 'success': True,
                 'image_bytes': img_bytes,
-                'width': pil_img.width,
-                'height': pil_img.height,
+                'width': thumbnail.shape[1],
+                'height': thumbnail.shape[0],
                 'from_cache': False,
                 'path': image_path
             }
@@ -373,26 +780,196 @@ def process_image_worker(image_path: str, size: int) -> Dict:
     except Exception as e:
         return {'success': False, 'error': str(e), 'path': image_path}
 
-def image_to_bytes(pil_img: Image.Image, format: str = 'JPEG', quality: int = 90) -> bytes:
-    """Convert PIL Image to bytes"""
-    import io
+def encode_jpeg(img_array: np.ndarray, quality: int = 90) -> np.ndarray:
+    """Encode BGR/grayscale array to a JPEG buffer (libjpeg-turbo via OpenCV)"""
+    ok, buffer = cv2.imencode(
+        '.jpg', img_array,
+        [int(cv2.IMWRITE_JPEG_QUALITY), quality, int(cv2.IMWRITE_JPEG_OPTIMIZE), 0]
+    )
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buffer
+
+def image_to_bytes(img_array: np.ndarray, quality: int = 90) -> bytes:
+    """Encode BGR/grayscale array to JPEG bytes"""
+    return encode_jpeg(img_array, quality=quality).tobytes()
+
+def encode_thumbnail(img_array: np.ndarray, image_format: str = 'jpeg') -> bytes:
+    """Encode thumbnail as JPEG (quality 85) or WebP (quality 80)"""
+    if image_format == 'webp':
+        ok, buffer = cv2.imencode('.webp', img_array, [int(cv2.IMWRITE_WEBP_QUALITY), 80])
+        if not ok:
+            raise ValueError("WebP encoding failed")
+        return buffer.tobytes()
+    
+    return image_to_bytes(img_array, quality=85)
+
+def bytes_to_data_url(img_data) -> str:
+    """Wrap encoded JPEG (bytes or any buffer) in a data URL (legacy support)"""
+    # pybase64 (SIMD) when installed; output is pure ASCII
+    b64_data = (pybase64 or base64).b64encode(img_data).decode('ascii')
+    
+    return f'data:image/jpeg;base64,{b64_data}'
+
+def image_to_data_url(img_array: np.ndarray, quality: int = 90) -> str:
+    """Encode BGR/grayscale array to JPEG data URL (legacy support)"""
+    # Base64 reads the imencode buffer directly, no intermediate bytes copy
+    return bytes_to_data_url(encode_jpeg(img_array, quality=quality))
+
+def get_process_pool():
+    """Get executor for CPU-bound batch work (one process per core, threads on Windows or multi-worker)"""
+    global process_pool
+    if sys.platform == "win32" or SERVER_WORKERS > 1:
+        # Threaded fallback; OpenCV releases the GIL while it works, and with several
+        # uvicorn workers a process pool each would start workers x cores processes
+        return thread_pool
+    if process_pool is None:
+        process_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return process_pool
+
+def batch_thumbnail_worker(image_path: str, size: int, mtime_ns: Optional[int] = None) -> Dict:
+    """Worker function for legacy Base64 batch thumbnails (runs in process pool)"""
+    try:
+        # Same pipeline, disk cache and missing-file check as /thumbnail-binary
+        result = process_image_worker(image_path, size, mtime_ns=mtime_ns)
+        if not result['success']:
+            return result
+        
+        return {
+            'success': True,
+            'data_url': bytes_to_data_url(result['image_bytes']),
+            'width': result['width'],
+            'height': result['height'],
+            'from_cache': result['from_cache'],
+            'path': image_path
+        }
+        
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'path': image_path}
+
+def read_radiance_header(image_path: str) -> Optional[Tuple[int, int, int]]:
+    """Read (width, height, channels) from a Radiance .hdr/.pic header"""
+    with open(image_path, 'rb') as f:
+        if not f.readline().startswith(b'#?'):
+            return None
+        
+        # Header lines run until a blank line, followed by e.g. "-Y 300 +X 500"
+        while f.readline().strip():
+            pass
+        tokens = f.readline().split()
+    
+    # Malformed resolution line (wrong axes, non-numeric sizes): no header info
+    if len(tokens) != 4 or not (tokens[1].isdigit() and tokens[3].isdigit()):
+        return None
+    axes = {tokens[0][1:]: int(tokens[1]), tokens[2][1:]: int(tokens[3])}
+    if set(axes) != {b'X', b'Y'}:
+        return None
+    return axes[b'X'], axes[b'Y'], 3
+
+def read_image_header(image_path: str) -> Optional[Tuple[int, int, int]]:
+    """Read (width, height, channels) from the file header without decoding pixels"""
+    try:
+        extension = get_extension(image_path)
+        if extension in ('.hdr', '.pic'):
+            return read_radiance_header(image_path)
+        
+        if extension == '.exr':
+            if OpenEXR is None:
+                return None
+            exr_file = OpenEXR.InputFile(image_path)
+            try:
+                header = exr_file.header()
+            finally:
+                exr_file.close()
+            window = header['dataWindow']
+            return (
+                window.max.x - window.min.x + 1,
+                window.max.y - window.min.y + 1,
+                len(header['channels'])
+            )
+        
+        # Image.open only parses the header; pixels are loaded lazily
+        with Image.open(image_path) as pil_img:
+            if pil_img.mode == 'P':
+                channels = 4 if 'transparency' in pil_img.info else 3
+            else:
+                channels = len(pil_img.getbands())
+            return pil_img.width, pil_img.height, channels
+    except Exception:
+        return None
+
+def image_info_worker(image_path: str, file_size: Optional[int] = None) -> Dict:
+    """Worker function for image info (runs in thread pool; pass file_size when already stat'ed)"""
+    if file_size is None:
+        file_size = os.path.getsize(image_path)
+    
+    # Determine format
+    ext = Path(image_path).suffix.lower()
+    format_name = ext[1:].upper() if ext else "UNKNOWN"
+    
+    info = read_image_header(image_path)
+    
+    if info is None:
+        # Full OpenCV decode only for formats without a header reader (e.g. EXR without OpenEXR)
+        img_array = load_image_opencv(image_path)
+        if img_array is not None:
+            channels = img_array.shape[2] if len(img_array.shape) > 2 else 1
+            info = (img_array.shape[1], img_array.shape[0], channels)
     
-    buffer = io.BytesIO()
-    pil_img.save(buffer, format=format, quality=quality)
-    return buffer.getvalue()
+    if info is None:
+        return {'success': False, 'error': 'Failed to get image info'}
+    
+    width, height, channels = info
+    return {
+        'success': True,
+        'width': width,
+        'height': height,
+        'channels': channels,
+        'format': format_name,
+        'size_bytes': file_size
+    }
 
-def image_to_data_url(pil_img: Image.Image, format: str = 'JPEG', quality: int = 90) -> str:
-    """Convert PIL Image to data URL (legacy support)"""
-    import io
+def full_image_worker(image_path: str, max_size: int) -> Optional[np.ndarray]:
+    """Worker function to decode a full image ready for JPEG encoding (runs in thread pool)"""
+    img_array = load_image_opencv(image_path)
+    if img_array is None:
+        return None
     
-    buffer = io.BytesIO()
-    pil_img.save(buffer, format=format, quality=quality)
-    img_data = buffer.getvalue()
+    # Resize if too large (max_size = 0 means no limit)
+    if max_size > 0:
+        return create_thumbnail(img_array, max_size)
     
-    mime_type = f'image/{format.lower()}'
-    b64_data = base64.b64encode(img_data).decode('utf-8')
+    # Process HDR images
+    if img_array.dtype in [np.float32, np.float64]:
+        img_array = process_hdr_image(img_array)
     
-    return f'data:{mime_type};base64,{b64_data}'
+    # 8-bit, alpha flattened for JPEG
+    return flatten_alpha(to_uint8(img_array))
+
+async def run_io(func, *args):
+    """Run a blocking filesystem call on the default executor, off the event loop"""
+    # CPU-heavy work goes to thread_pool/process pool so stat calls never queue behind it
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+def stat_or_404(image_path: str) -> os.stat_result:
+    """Stat the requested image once (existence check + cache key mtime)"""
+    try:
+        return os.stat(image_path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Image file not found")
+
+def stat_existing(image_paths: List[str]) -> List[Tuple[str, int]]:
+    """Return (path, st_mtime_ns) for each path that exists, skipping the rest"""
+    stats = []
+    for path in image_paths:
+        try:
+            stats.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            pass
+    return stats
 
 # API Endpoints
 @app.get("/")
@@ -406,24 +983,30 @@ async def health_check():
 @app.get("/performance-stats")
 async def get_performance_stats():
     """Get performance statistics"""
-    try:
-        import psutil
+    if psutil is not None:
         memory_usage = psutil.Process().memory_info().rss / (1024 * 1024)
-    except ImportError:
+    else:
         memory_usage = 0
     
-    # Cache statistics
-    cache_files = list(CACHE_DIR.glob("*.jpg"))
-    cache_size_mb = sum(f.stat().st_size for f in cache_files) / (1024 * 1024)
+    # Cache statistics from the index, no directory listing
+    try:
+        cache_files, cache_size = await run_io(
+            lambda: get_cache_db().execute("SELECT COUNT(*), (SELECT size FROM cache_total) FROM cache").fetchone()
+        )
+    except (sqlite3.Error, OSError) as e:
+        # Unusable index (read-only or locked cache dir): report an empty cache, like the other index users
+        print(f"Cache index read failed: {e}")
+        cache_files, cache_size = 0, 0
+    cache_size_mb = cache_size / (1024 * 1024)
     
     return {
         "cpu_cores": os.cpu_count(),
         "thread_workers": MAX_WORKERS,
         "memory_usage_mb": round(memory_usage, 2),
-        "cache_files": len(cache_files),
+        "cache_files": cache_files,
         "cache_size_mb": round(cache_size_mb, 2),
         "opencv_version": cv2.__version__,
-        "gpu_available": cv2.cuda.getCudaEnabledDeviceCount() > 0 if hasattr(cv2, 'cuda') else False
+        "gpu_available": CUDA_AVAILABLE
     }
 
 @app.post("/scan-folder", response_model=ScanResult)
@@ -432,27 +1015,13 @@ async def scan_folder(request: ScanFolderRequest):
     try:
         folder_path = Path(request.folder_path)
         
-        if not folder_path.exists():
+        if not await run_io(folder_path.exists):
             raise HTTPException(status_code=404, detail="Folder not found")
         
-        if not folder_path.is_dir():
+        if not await run_io(folder_path.is_dir):
             raise HTTPException(status_code=400, detail="Path is not a directory")
         
-        images = []
-        
-        if request.recursive:
-            # Recursive scan
-            for file_path in folder_path.rglob('*'):
-                if file_path.is_file() and is_image_file(file_path):
-                    images.append(get_file_info(file_path))
-        else:
-            # Non-recursive scan
-            for file_path in folder_path.iterdir():
-                if file_path.is_file() and is_image_file(file_path):
-                    images.append(get_file_info(file_path))
-        
-        # Sort by name
-        images.sort(key=lambda x: x.name.lower())
+        images = await run_io(scan_images, folder_path, request.recursive, request.refresh)
         
         return ScanResult(
             success=True,
@@ -469,26 +1038,33 @@ async def scan_folder(request: ScanFolderRequest):
         )
 
 @app.post("/thumbnail-binary")
-async def generate_thumbnail_binary(request: ThumbnailRequest):
+async def generate_thumbnail_binary(request: ThumbnailRequest, http_request: Request):
     """Generate thumbnail for image and return binary data (optimized)"""
     try:
         image_path = request.image_path
+        stat = await run_io(stat_or_404, image_path)
         
-        if not os.path.exists(image_path):
-            raise HTTPException(status_code=404, detail="Image file not found")
+        # Smaller WebP output for clients that accept it, JPEG otherwise
+        image_format = 'webp' if 'image/webp' in http_request.headers.get('accept', '') else 'jpeg'
         
         # Process in thread pool for better performance
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         result = await loop.run_in_executor(
-            thread_pool, 
-            process_image_worker, 
-            image_path, 
-            request.size
+            thread_pool,
+            partial(
+                process_image_worker,
+                image_path,
+                request.size,
+                image_format=image_format,
+                read_cached=False,  # Cache hits are sent straight from disk below
+                mtime_ns=stat.st_mtime_ns
+            )
         )
         
         if result['success']:
             headers = {
-                "X-From-Cache": str(result.get('from_cache', False))
+                "X-From-Cache": str(result.get('from_cache', False)),
+                "Vary": "Accept"
             }
             
             if 'width' in result:
@@ -496,9 +1072,17 @@ async def generate_thumbnail_binary(request: ThumbnailRequest):
             if 'height' in result:
                 headers["X-Image-Height"] = str(result['height'])
             
+            # Cache hits are streamed from disk (sendfile) without loading them
+            if result.get('from_cache'):
+                return FileResponse(
+                    result['cache_path'],
+                    media_type=THUMBNAIL_FORMATS[image_format][1],
+                    headers=headers
+                )
+            
             return Response(
                 content=result['image_bytes'],
-                media_type="image/jpeg",
+                media_type=THUMBNAIL_FORMATS[image_format][1],
                 headers=headers
             )
         else:
@@ -509,48 +1093,26 @@ async def generate_thumbnail_binary(request: ThumbnailRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/thumbnail", response_model=ThumbnailResult)
+@app.post("/thumbnail", response_model=ThumbnailResult, deprecated=True)
 async def generate_thumbnail(request: ThumbnailRequest):
-    """Generate thumbnail for image (legacy Base64 support)"""
+    """Generate thumbnail for image (legacy Base64 support, use /thumbnail-binary)"""
     try:
         image_path = request.image_path
+        stat = await run_io(stat_or_404, image_path)
         
-        if not os.path.exists(image_path):
-            raise HTTPException(status_code=404, detail="Image file not found")
-        
-        # Try OpenCV first (better for EXR)
-        img_array = load_image_opencv(image_path)
-        
-        if img_array is not None:
-            # Create thumbnail from numpy array
-            thumbnail = create_thumbnail(img_array, request.size)
-            data_url = image_to_data_url(thumbnail)
-            
-            return ThumbnailResult(
-                success=True,
-                data_url=data_url,
-                width=thumbnail.width,
-                height=thumbnail.height
-            )
+        # Same pipeline and disk cache as /thumbnail-binary
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            thread_pool,
+            partial(process_image_worker, image_path, request.size, mtime_ns=stat.st_mtime_ns)
+        )
         
-        # Fallback to PIL
-        pil_img = load_image_pil(image_path)
-        if pil_img is not None:
-            pil_img.thumbnail((request.size, request.size), Image.Resampling.LANCZOS)
-            
-            # Convert RGBA to RGB if needed
-            if pil_img.mode == 'RGBA':
-                background = Image.new('RGB', pil_img.size, (255, 255, 255))
-                background.paste(pil_img, mask=pil_img.split()[3])
-                pil_img = background
-            
-            data_url = image_to_data_url(pil_img)
-            
+        if result['success']:
             return ThumbnailResult(
                 success=True,
-                data_url=data_url,
-                width=pil_img.width,
-                height=pil_img.height
+                data_url=bytes_to_data_url(result['image_bytes']),
+                width=result['width'],
+                height=result['height']
             )
         
         raise Exception("Failed to load image with both OpenCV and PIL")
@@ -567,48 +1129,12 @@ async def get_image_info(request: ImageInfoRequest):
     try:
         image_path = request.image_path
         
-        if not os.path.exists(image_path):
-            raise HTTPException(status_code=404, detail="Image file not found")
-        
-        # Get file size
-        file_size = os.path.getsize(image_path)
+        stat = await run_io(stat_or_404, image_path)
         
-        # Try OpenCV first
-        img_array = load_image_opencv(image_path)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(thread_pool, image_info_worker, image_path, stat.st_size)
         
-        if img_array is not None:
-            height, width = img_array.shape[:2]
-            channels = img_array.shape[2] if len(img_array.shape) > 2 else 1
-            
-            # Determine format
-            ext = Path(image_path).suffix.lower()
-            format_name = ext[1:].upper() if ext else "UNKNOWN"
-            
-            return ImageInfoResult(
-                success=True,
-                width=width,
-                height=height,
-                channels=channels,
-                format=format_name,
-                size_bytes=file_size
-            )
-        
-        # Fallback to PIL
-        pil_img = load_image_pil(image_path)
-        if pil_img is not None:
-            width, height = pil_img.size
-            channels = len(pil_img.getbands())
-            
-            return ImageInfoResult(
-                success=True,
-                width=width,
-                height=height,
-                channels=channels,
-                format=pil_img.format or "UNKNOWN",
-                size_bytes=file_size
-            )
-        
-        raise Exception("Failed to get image info")
+        return ImageInfoResult(**result)
         
     except Exception as e:
         return ImageInfoResult(
@@ -624,19 +1150,20 @@ async def generate_batch_thumbnails_parallel(request: BatchThumbnailRequest):
     try:
         start_time = time.time()
         
-        # Filter existing files
-        valid_paths = [path for path in request.image_paths if os.path.exists(path)]
+        # Filter existing files; their mtimes feed the cache keys without another stat
+        valid_paths = await run_io(stat_existing, request.image_paths)
         
         if not valid_paths:
             return {"success": False, "error": "No valid image files found"}
         
-        # Process all images in parallel
-        loop = asyncio.get_event_loop()
+        # Process all images in parallel, one process per core
+        loop = asyncio.get_running_loop()
+        executor = get_process_pool()
         
         # Create tasks for parallel processing
         tasks = [
-            loop.run_in_executor(thread_pool, process_image_worker, path, request.size)
-            for path in valid_paths
+            loop.run_in_executor(executor, batch_thumbnail_worker, path, request.size, mtime_ns)
+            for path, mtime_ns in valid_paths
         ]
         
         # Wait for all tasks to complete
@@ -659,7 +1186,7 @@ async def generate_batch_thumbnails_parallel(request: BatchThumbnailRequest):
                 thumbnails_data.append({
                     'path': result['path'],
                     'success': True,
-                    'image_bytes': result['image_bytes'],
+                    'data_url': result['data_url'],
                     'width': result.get('width', 0),
                     'height': result.get('height', 0),
                     'from_cache': result.get('from_cache', False)
@@ -685,70 +1212,94 @@ async def generate_batch_thumbnails_parallel(request: BatchThumbnailRequest):
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-@app.post("/batch-thumbnails", response_model=BatchThumbnailResult)
+@app.post("/batch-thumbnails-multipart")
+async def generate_batch_thumbnails_multipart(request: BatchThumbnailRequest):
+    """Stream multiple thumbnails as raw JPEG parts (multipart/mixed), in completion order"""
+    boundary = uuid.uuid4().hex
+    
+    # Process all images in parallel
+    loop = asyncio.get_running_loop()
+    tasks = [
+        loop.run_in_executor(thread_pool, process_image_worker, path, request.size)
+        for path in request.image_paths
+    ]
+    
+    async def stream_parts():
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            
+            # Content-Location identifies the source image of each part
+            headers = [f"Content-Location: {quote(result['path'])}"]
+            if result['success']:
+                headers.append("Content-Type: image/jpeg")
+                headers.append(f"X-From-Cache: {result.get('from_cache', False)}")
+                if 'width' in result:
+                    headers.append(f"X-Image-Width: {result['width']}")
+                if 'height' in result:
+                    headers.append(f"X-Image-Height: {result['height']}")
+                body = result['image_bytes']
+            else:
+                headers.append("Content-Type: text/plain; charset=utf-8")
+                body = result.get('error', 'Failed to process image').encode('utf-8')
+            
+            part_header = f"--{boundary}\r\n" + "\r\n".join(headers) + "\r\n\r\n"
+            yield part_header.encode('utf-8') + body + b"\r\n"
+        
+        yield f"--{boundary}--\r\n".encode('utf-8')
+    
+    return StreamingResponse(stream_parts(), media_type=f"multipart/mixed; boundary={boundary}")
+
+def pack_batch_results(results: List[Dict]) -> bytes:
+    """Pack thumbnail results into the /batch-thumbnails-binary framed format"""
+    chunks = [BATCH_COUNT_STRUCT.pack(len(results))]
+    for result in results:
+        path_bytes = result['path'].encode('utf-8')
+        if result['success']:
+            status, blob = 1, result['image_bytes']
+            width, height = result['width'], result['height']
+        else:
+            status, blob = 0, result.get('error', 'Failed to process image').encode('utf-8')
+            width = height = 0
+        
+        chunks.append(BATCH_PATH_LEN_STRUCT.pack(len(path_bytes)))
+        chunks.append(path_bytes)
+        chunks.append(BATCH_ITEM_STRUCT.pack(status, width, height, len(blob)))
+        chunks.append(blob)
+    
+    return b''.join(chunks)
+
+@app.post("/batch-thumbnails-binary")
+async def generate_batch_thumbnails_binary(request: BatchThumbnailRequest):
+    """Generate multiple thumbnails as one framed binary blob, in request order"""
+    # Process all images in parallel
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*[
+        loop.run_in_executor(thread_pool, process_image_worker, path, request.size)
+        for path in request.image_paths
+    ])
+    
+    return Response(content=pack_batch_results(results), media_type="application/octet-stream")
+
+@app.post("/batch-thumbnails", response_model=BatchThumbnailResult, deprecated=True)
 async def generate_batch_thumbnails(request: BatchThumbnailRequest):
-    """Generate multiple thumbnails in batch for better performance (legacy Base64)"""
+    """Generate multiple thumbnails in batch (legacy Base64, use /batch-thumbnails-multipart)"""
     try:
+        # Decode/resize/encode every image in parallel across CPU cores
+        loop = asyncio.get_running_loop()
+        executor = get_process_pool()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(executor, batch_thumbnail_worker, image_path, request.size)
+            for image_path in request.image_paths
+        ])
+        
         thumbnails = {}
         processed_count = 0
         
-        for image_path in request.image_paths:
-            try:
-                if not os.path.exists(image_path):
-                    thumbnails[image_path] = ThumbnailResult(
-                        success=False,
-                        error="Image file not found"
-                    )
-                    continue
-                
-                # Try OpenCV first (better for EXR)
-                img_array = load_image_opencv(image_path)
-                
-                if img_array is not None:
-                    # Create thumbnail from numpy array
-                    thumbnail = create_thumbnail(img_array, request.size)
-                    data_url = image_to_data_url(thumbnail, quality=85)  # Slightly lower quality for speed
-                    
-                    thumbnails[image_path] = ThumbnailResult(
-                        success=True,
-                        data_url=data_url,
-                        width=thumbnail.width,
-                        height=thumbnail.height
-                    )
-                    processed_count += 1
-                    continue
-                
-                # Fallback to PIL
-                pil_img = load_image_pil(image_path)
-                if pil_img is not None:
-                    pil_img.thumbnail((request.size, request.size), Image.Resampling.LANCZOS)
-                    
-                    # Convert RGBA to RGB if needed
-                    if pil_img.mode == 'RGBA':
-                        background = Image.new('RGB', pil_img.size, (255, 255, 255))
-                        background.paste(pil_img, mask=pil_img.split()[3])
-                        pil_img = background
-                    
-                    data_url = image_to_data_url(pil_img, quality=85)
-                    
-                    thumbnails[image_path] = ThumbnailResult(
-                        success=True,
-                        data_url=data_url,
-                        width=pil_img.width,
-                        height=pil_img.height
-                    )
-                    processed_count += 1
-                else:
-                    thumbnails[image_path] = ThumbnailResult(
-                        success=False,
-                        error="Failed to load image with both OpenCV and PIL"
-                    )
-                    
-            except Exception as e:
-                thumbnails[image_path] = ThumbnailResult(
-                    success=False,
-                    error=str(e)
-                )
+        for result in results:
+            image_path = result.pop('path')
+            thumbnails[image_path] = ThumbnailResult(**result)
+            if result['success']:
+                processed_count += 1
         
         return BatchThumbnailResult(
             success=True,
@@ -770,97 +1321,61 @@ async def get_full_image_binary(request: FullImageRequest):
     try:
         image_path = request.image_path
         
-        if not os.path.exists(image_path):
-            raise HTTPException(status_code=404, detail="Image file not found")
+        await run_io(stat_or_404, image_path)
         
-        # Try OpenCV first
-        img_array = load_image_opencv(image_path)
+        # Decode, resize and encode off the event loop
+        loop = asyncio.get_running_loop()
+        img_array = await loop.run_in_executor(
+            thread_pool,
+            full_image_worker,
+            image_path,
+            request.max_size
+        )
         
         if img_array is not None:
-            # Process HDR images
-            if img_array.dtype in [np.float32, np.float64]:
-                img_array = process_hdr_image(img_array)
-            
-            # Convert to PIL
-            if len(img_array.shape) == 2:
-                pil_img = Image.fromarray(img_array, mode='L')
-            elif img_array.shape[2] == 3:
-                pil_img = Image.fromarray(img_array, mode='RGB')
-            elif img_array.shape[2] == 4:
-                pil_img = Image.fromarray(img_array, mode='RGBA')
-            else:
-                raise ValueError(f"Unsupported image shape: {img_array.shape}")
-            
-            # Resize if too large (max_size = 0 means no limit)
-            if request.max_size > 0:
-                pil_img.thumbnail((request.max_size, request.max_size), Image.Resampling.LANCZOS)
-            
-            # Convert RGBA to RGB for JPEG
-            if pil_img.mode == 'RGBA':
-                background = Image.new('RGB', pil_img.size, (255, 255, 255))
-                background.paste(pil_img, mask=pil_img.split()[3])
-                pil_img = background
-            
-            img_bytes = image_to_bytes(pil_img, quality=95)
+            img_bytes = await loop.run_in_executor(thread_pool, image_to_bytes, img_array, 95)
             
             return Response(
                 content=img_bytes,
                 media_type="image/jpeg",
                 headers={
-                    "X-Image-Width": str(pil_img.width),
-                    "X-Image-Height": str(pil_img.height)
+                    "X-Image-Width": str(img_array.shape[1]),
+                    "X-Image-Height": str(img_array.shape[0])
                 }
             )
         
         raise HTTPException(status_code=500, detail="Failed to load full image")
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/full-image", response_model=ThumbnailResult)
+@app.post("/full-image", response_model=ThumbnailResult, deprecated=True)
 async def get_full_image(request: FullImageRequest):
-    """Get full resolution image (with optional max size limit)"""
+    """Get full resolution image (legacy Base64, use /full-image-binary)"""
     try:
         image_path = request.image_path
         
-        if not os.path.exists(image_path):
-            raise HTTPException(status_code=404, detail="Image file not found")
+        await run_io(stat_or_404, image_path)
         
-        # Try OpenCV first
-        img_array = load_image_opencv(image_path)
+        # Decode, resize and encode off the event loop
+        loop = asyncio.get_running_loop()
+        img_array = await loop.run_in_executor(
+            thread_pool,
+            full_image_worker,
+            image_path,
+            request.max_size
+        )
         
         if img_array is not None:
-            # Process HDR images
-            if img_array.dtype in [np.float32, np.float64]:
-                img_array = process_hdr_image(img_array)
-            
-            # Convert to PIL
-            if len(img_array.shape) == 2:
-                pil_img = Image.fromarray(img_array, mode='L')
-            elif img_array.shape[2] == 3:
-                pil_img = Image.fromarray(img_array, mode='RGB')
-            elif img_array.shape[2] == 4:
-                pil_img = Image.fromarray(img_array, mode='RGBA')
-            else:
-                raise ValueError(f"Unsupported image shape: {img_array.shape}")
-            
-            # Resize if too large (max_size = 0 means no limit)
-            if request.max_size > 0:
-                pil_img.thumbnail((request.max_size, request.max_size), Image.Resampling.LANCZOS)
-            
-            # Convert RGBA to RGB for JPEG
-            if pil_img.mode == 'RGBA':
-                background = Image.new('RGB', pil_img.size, (255, 255, 255))
-                background.paste(pil_img, mask=pil_img.split()[3])
-                pil_img = background
-            
-            data_url = image_to_data_url(pil_img, quality=95)
+            data_url = await loop.run_in_executor(thread_pool, image_to_data_url, img_array, 95)
             
             return ThumbnailResult(
                 success=True,
                 data_url=data_url,
-                width=pil_img.width,
-                height=pil_img.height
+                width=img_array.shape[1],
+                height=img_array.shape[0]
             )
         
         raise Exception("Failed to load full image")
@@ -884,15 +1399,22 @@ if __name__ == "__main__":
         print(f"Cache directory: {CACHE_DIR}")
         print("Server started")  # This triggers the main process
         
-        # Use single worker with high thread count for better thread pool sharing
+        # Single server process by default: Electron's kill() only stops the uvicorn
+        # supervisor on Windows, leaving extra workers holding the port
+        print(f"Server workers: {SERVER_WORKERS}")
+        
+        # Multiple workers need the app as an import string; a single worker gets the object,
+        # otherwise uvicorn imports this file a second time as module "server"
         uvicorn.run(
-            app, 
+            app if SERVER_WORKERS == 1 else "server:app",
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
             host="127.0.0.1", 
             port=port, 
-            workers=1,  # Single worker to share thread pool
-            log_level="info",
+            workers=SERVER_WORKERS,
+            log_level="warning",  # Info-level logging is costly under load
             access_log=False,  # Disable access log for better performance
-            loop="asyncio"
+            loop="auto",  # uvloop when installed (uvicorn[standard], not on Windows)
+            http="auto"  # httptools when installed
         )
     except Exception as e:
         print(f"Failed to start server: {e}")
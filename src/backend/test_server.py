@@ -0,0 +1,147 @@
+"""
+Tests for the backend's pure helpers (run with: python -m pytest src/backend)
+"""
+
+import os
+import tempfile
+
+# Keep the import-time cache directory out of the user's home
+os.environ.setdefault('THUMB_CACHE', tempfile.mkdtemp(prefix='image_viewer_test_cache_'))
+
+import server
+
+
+def unpack_batch_results(data: bytes):
+    """Parse the /batch-thumbnails-binary framing back into (path, status, width, height, blob) tuples"""
+    (count,), offset = server.BATCH_COUNT_STRUCT.unpack_from(data), server.BATCH_COUNT_STRUCT.size
+    items = []
+    for _ in range(count):
+        (path_len,) = server.BATCH_PATH_LEN_STRUCT.unpack_from(data, offset)
+        offset += server.BATCH_PATH_LEN_STRUCT.size
+        path = data[offset:offset + path_len].decode('utf-8')
+        offset += path_len
+        status, width, height, blob_len = server.BATCH_ITEM_STRUCT.unpack_from(data, offset)
+        offset += server.BATCH_ITEM_STRUCT.size
+        items.append((path, status, width, height, data[offset:offset + blob_len]))
+        offset += blob_len
+    assert offset == len(data)
+    return items
+
+
+def test_pack_batch_results_round_trip():
+    results = [
+        {'success': True, 'path': '/fotos/a.jpg', 'image_bytes': b'\xff\xd8jpeg', 'width': 200, 'height': 150},
+        {'success': False, 'path': '/fotos/ç/b.png', 'error': 'Image file not found'},
+        {'success': False, 'path': '/fotos/c.png'},
+    ]
+
+    assert unpack_batch_results(server.pack_batch_results(results)) == [
+        ('/fotos/a.jpg', 1, 200, 150, b'\xff\xd8jpeg'),
+        ('/fotos/ç/b.png', 0, 0, 0, b'Image file not found'),
+        ('/fotos/c.png', 0, 0, 0, b'Failed to process image'),
+    ]
+
+
+def test_pack_batch_results_empty():
+    assert server.pack_batch_results([]) == b'\x00\x00\x00\x00'
+
+
+def make_cache(monkeypatch, tmp_path, max_bytes):
+    """Point the thumbnail cache and its index at tmp_path with a fresh connection"""
+    monkeypatch.setattr(server, 'CACHE_DIR', tmp_path)
+    monkeypatch.setattr(server, 'CACHE_INDEX_PATH', tmp_path / 'index.sqlite')
+    monkeypatch.setattr(server, 'CACHE_MAX_BYTES', max_bytes)
+    monkeypatch.setattr(server.cache_db_local, 'db', None, raising=False)
+    return server.get_cache_db()
+
+
+def cache_state(db):
+    """(running total, SUM(size), cached names) from the index"""
+    total = db.execute("SELECT size FROM cache_total").fetchone()[0]
+    size_sum = db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+    names = {name for (name,) in db.execute("SELECT name FROM cache")}
+    return total, size_sum, names
+
+
+def set_atimes(db, **atimes):
+    """Pin access times so LRU order doesn't depend on the clock's resolution"""
+    for key, atime in atimes.items():
+        db.execute("UPDATE cache SET atime = ? WHERE name = ?", (atime, f'{key}.jpg'))
+
+
+def test_cache_total_follows_upserts(monkeypatch, tmp_path):
+    db = make_cache(monkeypatch, tmp_path, 10_000)
+
+    server.save_cached_thumbnail('a', b'x' * 1000)
+    server.save_cached_thumbnail('b', b'x' * 500)
+    # Re-saving an existing key replaces its size instead of adding to it
+    server.save_cached_thumbnail('a', b'x' * 200)
+
+    assert cache_state(db) == (700, 700, {'a.jpg', 'b.jpg'})
+
+
+def test_evicts_least_recently_used_to_90_percent(monkeypatch, tmp_path):
+    db = make_cache(monkeypatch, tmp_path, 3000)
+
+    for key in ('a', 'b', 'c'):
+        server.save_cached_thumbnail(key, b'x' * 1000)
+    set_atimes(db, a=1, b=2, c=3)
+    # A cache hit makes 'a' the most recently used entry
+    server.touch_cached_thumbnail(tmp_path / 'a.jpg')
+    server.save_cached_thumbnail('d', b'x' * 1000)
+
+    total, size_sum, names = cache_state(db)
+    assert names == {'a.jpg', 'd.jpg'}
+    assert total == size_sum == 2000
+    assert sorted(path.name for path in tmp_path.glob('*.jpg')) == ['a.jpg', 'd.jpg']
+
+
+def test_eviction_keeps_rows_of_files_that_cannot_be_unlinked(monkeypatch, tmp_path):
+    db = make_cache(monkeypatch, tmp_path, 2500)
+    server.save_cached_thumbnail('locked', b'x' * 1000)
+    server.save_cached_thumbnail('b', b'x' * 1000)
+    set_atimes(db, locked=1, b=2)
+
+    # As on Windows while the file is still being sent
+    real_unlink = os.unlink
+    def unlink(path):
+        if os.path.basename(path) == 'locked.jpg':
+            raise PermissionError(13, 'in use', str(path))
+        real_unlink(path)
+    monkeypatch.setattr(server.os, 'unlink', unlink)
+
+    server.save_cached_thumbnail('c', b'x' * 1000)
+
+    # 'locked' stays indexed (and on disk) so a later eviction retries it; 'b' goes instead
+    total, size_sum, names = cache_state(db)
+    assert names == {'locked.jpg', 'c.jpg'}
+    assert total == size_sum == 2000
+    assert (tmp_path / 'locked.jpg').exists() and not (tmp_path / 'b.jpg').exists()
+
+
+def test_new_index_adopts_existing_thumbnails(monkeypatch, tmp_path):
+    (tmp_path / 'old.jpg').write_bytes(b'x' * 300)
+    (tmp_path / 'old.webp').write_bytes(b'x' * 200)
+    (tmp_path / 'partial.tmp').write_bytes(b'x' * 999)
+
+    db = make_cache(monkeypatch, tmp_path, 10_000)
+
+    assert cache_state(db) == (500, 500, {'old.jpg', 'old.webp'})
+
+
+def write_radiance(tmp_path, resolution_line: bytes, magic: bytes = b'#?RADIANCE\n'):
+    path = tmp_path / 'image.hdr'
+    path.write_bytes(magic + b'FORMAT=32-bit_rle_rgbe\nEXPOSURE=1.0\n\n' + resolution_line + b'\nPIXELS')
+    return str(path)
+
+
+def test_read_radiance_header(tmp_path):
+    assert server.read_radiance_header(write_radiance(tmp_path, b'-Y 300 +X 500')) == (500, 300, 3)
+    # Rotated orientations list X first
+    assert server.read_radiance_header(write_radiance(tmp_path, b'+X 640 -Y 480')) == (640, 480, 3)
+
+
+def test_read_radiance_header_rejects_malformed(tmp_path):
+    for resolution_line in (b'-Y 300', b'-Y abc +X 500', b'-Y 300 -Y 500', b'-Y -300 +X 500', b''):
+        assert server.read_radiance_header(write_radiance(tmp_path, resolution_line)) is None
+    assert server.read_radiance_header(write_radiance(tmp_path, b'-Y 300 +X 500', magic=b'P6\n')) is None
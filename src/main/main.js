@@ -249,13 +249,14 @@ ipcMain.handle('select-folder', async () => {
   return result.filePaths[0];
 });
 
-ipcMain.handle('scan-folder', async (event, folderPath, recursive = false) => {
+ipcMain.handle('scan-folder', async (event, folderPath, recursive = false, refresh = false) => {
   try {
     const response = await backendRequest('/scan-folder', {
       method: 'POST',
       body: JSON.stringify({
         folder_path: folderPath,
-        recursive: recursive
+        recursive: recursive,
+        refresh: refresh
       })
     });
     
@@ -272,7 +273,8 @@ ipcMain.handle('get-thumbnail-binary', async (event, imagePath, size = 200) => {
     const response = await fetch(url, {
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/json',
+        'Accept': 'image/webp,image/jpeg'
       },
       body: JSON.stringify({
         image_path: imagePath,
@@ -295,6 +297,7 @@ ipcMain.handle('get-thumbnail-binary', async (event, imagePath, size = 200) => {
     return {
       success: true,
       binary_data: uint8Array,
+      content_type: response.headers.get('Content-Type') || 'image/jpeg',
       width: width,
       height: height
     };
@@ -386,18 +389,41 @@ ipcMain.handle('get-batch-thumbnails', async (event, imagePaths, size = 200) =>
 
 ipcMain.handle('get-full-image', async (event, imagePath, maxSize = 0) => {
   try {
-    const response = await backendRequest('/full-image', {
+    // Binary endpoint: raw JPEG over HTTP, Base64 done natively by Node
+    const url = `${BACKEND_URL}/full-image-binary`;
+    const response = await fetch(url, {
       method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
       body: JSON.stringify({
         image_path: imagePath,
         max_size: maxSize
       })
     });
-    
-    return response;
+
+    if (!response.ok) {
+      throw new Error(`Backend request failed: ${response.status}`);
+    }
+
+    // Get image dimensions from headers
+    const width = parseInt(response.headers.get('X-Image-Width') || '0');
+    const height = parseInt(response.headers.get('X-Image-Height') || '0');
+
+    const buffer = Buffer.from(await response.arrayBuffer());
+
+    return {
+      success: true,
+      data_url: `data:image/jpeg;base64,${buffer.toString('base64')}`,
+      width: width,
+      height: height
+    };
   } catch (error) {
     console.error('Full image loading failed:', error);
-    throw error;
+    return {
+      success: false,
+      error: error.message
+    };
   }
 });
 
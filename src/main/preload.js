@@ -5,7 +5,7 @@ const { contextBridge, ipcRenderer } = require('electron');
 contextBridge.exposeInMainWorld('electronAPI', {
   // Folder operations
   selectFolder: () => ipcRenderer.invoke('select-folder'),
-  scanFolder: (folderPath, recursive) => ipcRenderer.invoke('scan-folder', folderPath, recursive),
+  scanFolder: (folderPath, recursive, refresh) => ipcRenderer.invoke('scan-folder', folderPath, recursive, refresh),
   
   // Image operations
   getThumbnail: (imagePath, size) => ipcRenderer.invoke('get-thumbnail', imagePath, size),
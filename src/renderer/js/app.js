@@ -94,7 +94,8 @@ class ImageViewerApp {
             }
             
             console.log(`📂 Selected folder: ${folderPath}`);
-            await this.loadFolder(folderPath);
+            // Picking a folder (even the same one again) always rescans it
+            await this.loadFolder(folderPath, true);
             
         } catch (error) {
             console.error('❌ Error selecting folder:', error);
@@ -102,7 +103,7 @@ class ImageViewerApp {
         }
     }
 
-    async loadFolder(folderPath) {
+    async loadFolder(folderPath, refresh = false) {
         try {
             this.currentFolder = folderPath;
             this.updateFolderInfo();
@@ -110,7 +111,7 @@ class ImageViewerApp {
             
             console.log(`🔍 Scanning folder: ${folderPath} (recursive: ${this.isRecursive})`);
             
-            const result = await window.electronAPI.scanFolder(folderPath, this.isRecursive);
+            const result = await window.electronAPI.scanFolder(folderPath, this.isRecursive, refresh);
             
             if (!result.success) {
                 throw new Error(result.error || 'Failed to scan folder');
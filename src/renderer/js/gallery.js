@@ -218,7 +218,7 @@ class Gallery {
             
             if (result.success && result.binary_data) {
                 // Converter dados binários para Blob e criar URL
-                const blob = new Blob([result.binary_data], { type: 'image/jpeg' });
+                const blob = new Blob([result.binary_data], { type: result.content_type || 'image/jpeg' });
                 const imageUrl = URL.createObjectURL(blob);
                 
                 // Cache do thumbnail com limite de memória (sempre tamanho máximo)
@@ -308,7 +308,7 @@ class Gallery {
                     
                     if (result.success && result.binary_data) {
                         // Converter dados binários para Blob e criar URL
-                        const blob = new Blob([result.binary_data], { type: 'image/jpeg' });
+                        const blob = new Blob([result.binary_data], { type: result.content_type || 'image/jpeg' });
                         const imageUrl = URL.createObjectURL(blob);
                         
                         // Cache do thumbnail (sempre tamanho máximo)